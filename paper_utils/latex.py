@@ -1,6 +1,192 @@
 from .utils import *
 
-from collections import OrderedDict
+import io
+from functools import lru_cache
+
+import numpy as np
+
+
+# Format strings for spanning cells, filled in with (span, content)
+_MULTICOLUMN = "\\multicolumn{%d}{c}{%s}"
+_MULTIROW = "\\multirow{%d}{*}{%s}"
+
+# Cell separator and row terminator of every tabular row
+_SEP = " & "
+_EOL = " \\\\\n"
+
+# Fixed closing lines of the tabular environment and of the table
+# environments, ending with a note about the required packages
+_TABULAR_FOOTER = "\\bottomrule\n\\end{tabular}\n"
+_PACKAGES_NOTE = "% Note: This table requires \\usepackage{booktabs} and \\usepackage{multirow} in your LaTeX preamble"
+_TABLE_FOOTER = "\\end{table}\n" + _PACKAGES_NOTE
+_WIDE_TABLE_FOOTER = "\\end{table*}\n" + _PACKAGES_NOTE
+
+
+@lru_cache(maxsize=128)
+def _default_column_format(n_cols):
+    """Return the default tabular column format: centered columns plus one for the row index."""
+    return "c" * (n_cols + 1)
+
+
+def _float_format(float_precision):
+    """Return the printf-style format string for floats with the given precision."""
+    return "%%.%df" % float_precision
+
+
+def _cell_formatter(float_precision):
+    """
+    Return a function that formats a single cell of a column.
+
+    Each value is checked on its own, since object columns can mix floats
+    with other types.
+    """
+    format_float = _float_format(float_precision).__mod__
+    
+    def format_cell(value):
+        if isinstance(value, float):
+            return format_float(value)
+        return str(value)
+    
+    return format_cell
+
+
+def _level_spans(level_values):
+    """
+    Run-length encode one level of a column index into (value, span) pairs.
+
+    Change points are found with a single vectorized comparison instead of
+    walking the level one label at a time.
+    """
+    values = np.asarray(level_values)
+    boundaries = np.r_[0, np.flatnonzero(values[1:] != values[:-1]) + 1, len(values)]
+    return list(zip(values[boundaries[:-1]].tolist(), np.diff(boundaries).tolist()))
+
+
+def _run_starts(values, missing_equal=False):
+    """
+    Return the positions where a new run of equal consecutive values starts.
+
+    The comparison is done in one vectorized pass. If missing_equal is True,
+    consecutive missing values count as equal to each other.
+    """
+    if len(values) == 0:
+        return np.array([], dtype=np.intp)
+    values_match = values[1:] == values[:-1]
+    if missing_equal:
+        is_missing = pd.isna(values)
+        values_match |= is_missing[1:] & is_missing[:-1]
+    return np.flatnonzero(np.r_[True, ~values_match])
+
+
+def _find_runs(values, forced_starts=(), missing_equal=False):
+    """
+    Split a column into runs of equal consecutive values.
+
+    A run also breaks at every position in forced_starts, which is how
+    multirow cells respect the runs of columns to their left. Returns the
+    run start positions and lengths as arrays.
+    """
+    starts = _run_starts(values, missing_equal=missing_equal)
+    if len(forced_starts):
+        starts = np.union1d(starts, forced_starts)
+    return starts, np.diff(np.r_[starts, len(values)])
+
+
+def _row_roles(runs):
+    """
+    Map row positions to their role in a multirow column.
+
+    Rows that start a run map to ("start", length), rows covered by an
+    earlier start map to ("skip",). Single-row runs render like regular
+    cells, so they and rows outside any run are absent.
+    """
+    roles = {}
+    for start, length in runs:
+        if length < 2:
+            continue
+        roles[start] = ("start", length)
+        for row_idx in range(start + 1, start + length):
+            roles[row_idx] = ("skip",)
+    return roles
+
+
+def _format_column(values, float_precision, blank_missing=False):
+    """
+    Format every cell of a column as a string in a single pass.
+
+    float64 columns, object columns holding only floats, and integer or
+    boolean columns are formatted with one vectorized call; other columns
+    fall back to formatting each value on its own. If blank_missing is True,
+    missing non-float values are rendered as "", using one missing-value
+    mask for the whole column.
+    """
+    if values.dtype == np.float64 or (
+        values.dtype == object and pd.api.types.infer_dtype(values, skipna=False) == "floating"
+    ):
+        return np.char.mod(_float_format(float_precision), np.asarray(values, dtype=np.float64)).tolist()
+    if isinstance(values.dtype, np.dtype) and values.dtype.kind in "iub":
+        return np.asarray(values).astype(str).tolist()
+    # Iterate over the raw array so numpy scalars such as float32 keep their
+    # own str() instead of becoming Python floats
+    format_cell = _cell_formatter(float_precision)
+    formatted = list(map(format_cell, np.asarray(values)))
+    if blank_missing:
+        cells = np.asarray(values, dtype=object)
+        for row_idx in np.flatnonzero(pd.isna(cells)).tolist():
+            if not isinstance(cells[row_idx], float):
+                formatted[row_idx] = ""
+    return formatted
+
+
+def _write_tabular(buf, col_format, header_levels, column_strings, index_strings, row_roles, index_name=""):
+    """
+    Write the tabular environment shared by both table builders to buf.
+
+    header_levels holds the column labels of each header level, column_strings
+    the formatted cells of each column and row_roles the multirow roles from
+    _row_roles keyed by column index. Multirow cells in column_strings are
+    filled in place.
+    """
+    write = buf.write
+    write(f"\\begin{{tabular}}{{{col_format}}}\n")
+    
+    # Add toprule
+    write("\\toprule\n")
+    
+    # Generate multicolumn headers for each level
+    for level, level_labels in enumerate(header_levels):
+        header_row = [index_name] if level == 0 else [""]
+        
+        # Get unique values and their spans at this level
+        spans = _level_spans(level_labels)
+        
+        # Create multicolumn entries
+        header_row.extend([_MULTICOLUMN % (span, value) for value, span in spans])
+        
+        write(_SEP.join(header_row) + _EOL)
+        
+        # Add a cmidrule after the last header level
+        if level == len(header_levels) - 1:
+            write("\\midrule\n")
+    
+    # Apply the multirow cells directly to the formatted columns
+    for col_idx, roles in row_roles.items():
+        cells = column_strings[col_idx]
+        for row_idx, role in roles.items():
+            if role[0] == "skip":
+                # Part of a multirow that already started, leave empty
+                cells[row_idx] = ""
+            else:
+                # Start of a multirow cell
+                cells[row_idx] = _MULTIROW % (role[1], cells[row_idx])
+    
+    # Add the data rows, joining each row straight from the formatted columns
+    join = _SEP.join
+    buf.writelines(join(row_values) + _EOL for row_values in zip(index_strings, *column_strings))
+    
+    # Add bottomrule after last data row and end the tabular environment
+    write(_TABULAR_FOOTER)
+
 
 def json_to_latex_table_with_multirow(
     data,
@@ -13,6 +199,7 @@ def json_to_latex_table_with_multirow(
     caption_position="bottom",
     small_font=True,
     full_width=True,
+    out=None,
 ):
     """
     Convert a list of nested dictionaries to a LaTeX table with multicolumn headers
@@ -38,182 +225,72 @@ def json_to_latex_table_with_multirow(
         If None, defaults to 'c' for each column
     caption_position : str, optional
         Position of the caption ('top' or 'bottom', default: 'bottom')
+    out : file-like, optional
+        Open text stream to write the table to as it is built. If given,
+        nothing is returned
     
     Returns:
     --------
-    str
-        LaTeX table code
+    str or None
+        LaTeX table code, or None if it was written to out
     """
     # If input is a string, parse it as JSON
     if isinstance(data, str):
-        data = json.loads(data)
+        data = parse_json(data)
     
     # Ensure data is a list
     if not isinstance(data, list):
         data = [data]
     
-    # Function to recursively extract column hierarchy and values from a nested dict
-    def extract_columns_and_values(nested_dict, prefix=None, path_order=None):
-        if prefix is None:
-            prefix = []
-        if path_order is None:
-            path_order = {}
-        
-        columns = []
-        flat_dict = {}
-        
-        # Process keys in the order they appear in the original JSON
-        for key_idx, (key, value) in enumerate(nested_dict.items()):
-            current_path = prefix + [key]
-            current_path_tuple = tuple(current_path)
-            
-            # Store the original order of this path
-            if current_path_tuple not in path_order:
-                path_order[current_path_tuple] = (len(prefix), key_idx)
-            
-            if isinstance(value, dict):
-                # If the value is a dictionary, recurse
-                sub_columns, sub_values, path_order = extract_columns_and_values(value, current_path, path_order)
-                columns.extend(sub_columns)
-                flat_dict.update(sub_values)
-            else:
-                # If the value is a leaf node, store the path and value
-                column_tuple = current_path_tuple
-                columns.append(column_tuple)
-                flat_dict[column_tuple] = value
-                
-        return columns, flat_dict, path_order
-    
-    # First pass: discover all possible column hierarchies
-    all_columns = set()
-    all_flat_items = []
-    path_order = {}
-    
-    for item in data:
-        # Extract column structure and flattened values
-        columns, flat_item, updated_path_order = extract_columns_and_values(item, path_order=path_order)
-        path_order.update(updated_path_order)
-        all_columns.update(columns)
-        all_flat_items.append(flat_item)
-    
-    # Determine the maximum depth of the hierarchy
-    max_depth = max(len(col) for col in all_columns) if all_columns else 0
-    
-    # Normalize all column tuples to have the same length
-    normalized_columns = []
-    for col in all_columns:
-        if len(col) < max_depth:
-            # Pad with empty strings
-            normalized_columns.append(col + ('',) * (max_depth - len(col)))
-        else:
-            normalized_columns.append(col)
-    
-    # Sort columns by their original order in the JSON structure
-    def custom_sort_key(col):
-        original_col = col[:len(col) - col.count('')]
-        if original_col in path_order:
-            return path_order[original_col]
-        # For columns we don't have ordering info, sort them last
-        return (float('inf'), float('inf'))
-    
-    sorted_columns = sorted(normalized_columns, key=custom_sort_key)
-    
-    # Create the MultiIndex
-    multi_index = pd.MultiIndex.from_tuples(sorted_columns)
-    
-    # Create DataFrame with the multi-index columns
-    df = pd.DataFrame(columns=multi_index)
-    
-    # Fill in the data
-    for i, flat_item in enumerate(all_flat_items):
-        for col, value in flat_item.items():
-            # Normalize the column tuple if needed
-            if len(col) < max_depth:
-                norm_col = col + ('',) * (max_depth - len(col))
-            else:
-                norm_col = col
-            
-            df.loc[i, norm_col] = value
+    # Flatten the nested dictionaries into a plain array of cells and padded
+    # column tuples; no DataFrame is needed to render them
+    values, index, columns = json_to_arrays(data)
+    max_depth = len(columns[0])
     
-    # Start building the LaTeX table
-    latex_code = []
+    # Start building the LaTeX table, streaming it to out if one was given
+    buf = io.StringIO() if out is None else out
     
     # Begin table environment
     if full_width:
-        latex_code.append(f"\\begin{{table*}}[{position}]")
+        buf.write(f"\\begin{{table*}}[{position}]\n")
     else:
-        latex_code.append(f"\\begin{{table}}[{position}]")
-    latex_code.append("\\centering")
+        buf.write(f"\\begin{{table}}[{position}]\n")
+    buf.write("\\centering\n")
     if small_font:
-        latex_code.append("\\small")
+        buf.write("\\small\n")
     
     # Add caption at the top if requested
     if caption and caption_position.lower() == "top":
-        latex_code.append(f"\\caption{{{caption}}}")
+        buf.write(f"\\caption{{{caption}}}\n")
         if label:
-            latex_code.append(f"\\label{{{label}}}")
+            buf.write(f"\\label{{{label}}}\n")
     
     # Begin tabular environment
-    n_cols = len(df.columns)
+    n_cols = len(columns)
+    
+    # Pull each column out of the cell array once, for both multirow run
+    # detection and formatting
+    column_series = [values[:, col_idx] for col_idx in range(n_cols)]
     
     # Use custom column format if provided, otherwise default to centered columns
     if column_format is None:
-        # Add one extra column for row index
-        col_format = "c" * (n_cols + 1)
+        col_format = _default_column_format(n_cols)
     else:
         col_format = column_format
         
-    latex_code.append(f"\\begin{{tabular}}{{{col_format}}}")
-    
-    # Add toprule
-    latex_code.append("\\toprule")
-    
-    # Add index name as the first column header if it exists
-    index_name = df.index.name if df.index.name else ""
-    
-    # Generate multicolumn headers for each level
-    for level in range(max_depth):
-        header_row = [index_name] if level == 0 else [""]
-        
-        # Get unique values and their spans at this level
-        level_values = df.columns.get_level_values(level)
-        spans = []
-        
-        current_value = level_values[0]
-        current_span = 1
-        
-        for i in range(1, len(level_values)):
-            if level_values[i] == current_value:
-                current_span += 1
-            else:
-                spans.append((current_value, current_span))
-                current_value = level_values[i]
-                current_span = 1
-                
-        # Add the last span
-        spans.append((current_value, current_span))
-        
-        # Create multicolumn entries
-        for value, span in spans:
-            header_row.append(f"\\multicolumn{{{span}}}{{c}}{{{value}}}")
-        
-        latex_code.append(" & ".join(header_row) + " \\\\")
-        
-        # Add a cmidrule after the last header level
-        if level == max_depth - 1:
-            latex_code.append("\\midrule")
-    
     # Find the columns to use multirow on
     multirow_cols = {}  # Map column names to their indices
     
     if multirow_columns:
-        # For each multirow column name
+        # Index every header label by the first column it appears in, at any level
+        label_to_col = {}
+        for i, col in enumerate(columns):
+            for level in col:
+                label_to_col.setdefault(level, i)
+        
         for col_name in multirow_columns:
-            # Find all columns that match this name at any level
-            for i, col in enumerate(df.columns):
-                if any(level == col_name for level in col):
-                    multirow_cols[col_name] = i
-                    break
+            if col_name in label_to_col:
+                multirow_cols[col_name] = label_to_col[col_name]
     
     # Create multirow groups for each column
     # This will track where multirows start and their lengths
@@ -225,141 +302,53 @@ def json_to_latex_table_with_multirow(
             continue
             
         col_idx = multirow_cols[col_name]
-        multirow_groups[col_name] = []
         
         # Get column values
-        col_values = df.iloc[:, col_idx].values
+        col_values = column_series[col_idx]
         
-        # Start by considering each value individually
-        runs = [(i, 1, col_values[i]) for i in range(len(col_values))]
+        # Respect changes in columns to the left: a run also starts wherever
+        # a multirow starts in any of them
+        forced_starts = [
+            start
+            for left_col_name in multirow_columns[:multirow_columns.index(col_name)]
+            if left_col_name in multirow_groups
+            for start, _, _ in multirow_groups[left_col_name]
+        ]
         
-        # Merge consecutive identical values, but respect changes in columns to the left
-        i = 0
-        while i < len(runs) - 1:
-            start1, length1, value1 = runs[i]
-            start2, length2, value2 = runs[i + 1]
-            
-            # Check if values are the same
-            values_match = (pd.isna(value1) and pd.isna(value2)) or value1 == value2
-            
-            # Check if any column to the left has a change at this position
-            can_merge = True
-            for left_col_name in multirow_columns:
-                if left_col_name == col_name:
-                    # We've reached our current column
-                    break
-                    
-                if left_col_name in multirow_cols and left_col_name in multirow_groups:
-                    # Check if there's a multirow start at the position where we would merge
-                    left_col_runs = multirow_groups[left_col_name]
-                    for left_start, left_length, _ in left_col_runs:
-                        if start2 == left_start:
-                            # There's a new multirow starting in a column to the left
-                            can_merge = False
-                            break
-                
-                if not can_merge:
-                    break
-            
-            # If we can merge these runs, do so
-            if values_match and can_merge:
-                runs[i] = (start1, length1 + length2, value1)
-                runs.pop(i + 1)
-            else:
-                i += 1
+        # A new run starts wherever the value changes (missing values count
+        # as equal to each other)
+        starts, lengths = _find_runs(col_values, forced_starts, missing_equal=True)
         
         # Store the final runs
-        multirow_groups[col_name] = runs
+        multirow_groups[col_name] = list(zip(starts.tolist(), lengths.tolist(), col_values[starts].tolist()))
     
-    # Add the data rows
-    for row_idx in range(len(df)):
-        row_values = []
-        
-        # First column is the index
-        row_values.append(str(df.index[row_idx]))
-        
-        # Process each column
-        for col_idx in range(len(df.columns)):
-            value = df.iloc[row_idx, col_idx]
-            
-            # Format the value
-            if isinstance(value, float):
-                formatted_value = f"{value:.{float_precision}f}"
-            elif pd.isna(value):
-                formatted_value = ""
-            else:
-                formatted_value = str(value)
-            
-            # Look for this column in our multirow groups
-            is_multirow_col = False
-            col_name = None
-            
-            for name, idx in multirow_cols.items():
-                if idx == col_idx:
-                    is_multirow_col = True
-                    col_name = name
-                    break
-            
-            if is_multirow_col and col_name in multirow_groups:
-                # Check if this row is the start of a multirow
-                is_start_of_multirow = False
-                multirow_length = 1
-                
-                for start, length, _ in multirow_groups[col_name]:
-                    if row_idx == start:
-                        is_start_of_multirow = True
-                        multirow_length = length
-                        break
-                
-                if is_start_of_multirow and multirow_length > 1:
-                    # Create a multirow cell
-                    row_values.append(f"\\multirow{{{multirow_length}}}{{*}}{{{formatted_value}}}")
-                elif is_start_of_multirow:
-                    # Single row, just use the formatted value
-                    row_values.append(formatted_value)
-                else:
-                    # Check if this is part of a multirow that already started
-                    is_in_multirow = False
-                    for start, length, _ in multirow_groups[col_name]:
-                        if start < row_idx < start + length:
-                            is_in_multirow = True
-                            break
-                    
-                    if is_in_multirow:
-                        # Part of a multirow that already started, leave empty
-                        row_values.append("")
-                    else:
-                        # Not part of a multirow, use the formatted value
-                        row_values.append(formatted_value)
-            else:
-                # Regular column, use the formatted value
-                row_values.append(formatted_value)
-        
-        # Add the row to the table
-        latex_code.append(" & ".join(row_values) + " \\\\")
+    # Precompute the role of every row in each multirow column. When several
+    # names resolve to the same column, the first one listed wins.
+    row_roles = {}
+    for col_name, col_idx in multirow_cols.items():
+        if col_idx not in row_roles and col_name in multirow_groups:
+            row_roles[col_idx] = _row_roles((start, length) for start, length, _ in multirow_groups[col_name])
     
-    # Add bottomrule after last data row
-    latex_code.append("\\bottomrule")
+    # Format each column once up front instead of cell by cell
+    column_strings = [_format_column(col_values, float_precision, blank_missing=True) for col_values in column_series]
     
-    # End the tabular environment
-    latex_code.append("\\end{tabular}")
+    # Convert the index labels to strings once as well
+    index_strings = [str(row_idx) for row_idx in (range(len(values)) if index is None else index)]
+    
+    # Write the headers and data rows of the tabular environment
+    header_levels = [np.array([col[level] for col in columns], dtype=object) for level in range(max_depth)]
+    _write_tabular(buf, col_format, header_levels, column_strings, index_strings, row_roles)
     
     # Add caption at the bottom if requested (default)
     if caption and caption_position.lower() != "top":
-        latex_code.append(f"\\caption{{{caption}}}")
+        buf.write(f"\\caption{{{caption}}}\n")
         if label:
-            latex_code.append(f"\\label{{{label}}}")
+            buf.write(f"\\label{{{label}}}\n")
     
-    # End the table environment
-    if full_width:
-        latex_code.append("\\end{table*}")
-    else:
-        latex_code.append("\\end{table}")
-    
-    # Add a note about required packages
-    latex_code.append("% Note: This table requires \\usepackage{booktabs} and \\usepackage{multirow} in your LaTeX preamble")
+    # End the table environment and add a note about required packages
+    buf.write(_WIDE_TABLE_FOOTER if full_width else _TABLE_FOOTER)
     
-    return "\n".join(latex_code)
+    return buf.getvalue() if out is None else None
 
 def pandas_to_latex_with_multicolumn_and_multirow(
     df, 
@@ -369,7 +358,8 @@ def pandas_to_latex_with_multicolumn_and_multirow(
     float_precision=4,
     column_format=None,
     caption_position="bottom",
-    multirow_columns=None
+    multirow_columns=None,
+    out=None
 ):
     """
     Convert a pandas DataFrame with MultiIndex columns to a LaTeX table with multicolumn headers
@@ -395,83 +385,46 @@ def pandas_to_latex_with_multicolumn_and_multirow(
     multirow_columns : list, optional
         List of column names where cells with identical consecutive values 
         should be merged using multirow
+    out : file-like, optional
+        Open text stream to write the table to as it is built. If given,
+        nothing is returned
     
     Returns:
     --------
-    str
-        LaTeX table code
+    str or None
+        LaTeX table code, or None if it was written to out
     """
     # Check if the DataFrame has MultiIndex columns
     if not isinstance(df.columns, pd.MultiIndex):
         raise ValueError("DataFrame must have MultiIndex columns")
     
-    # Get the number of levels in the column MultiIndex
-    n_levels = df.columns.nlevels
-    
-    # Start building the LaTeX table
-    latex_code = []
+    # Start building the LaTeX table, streaming it to out if one was given
+    buf = io.StringIO() if out is None else out
     
     # Begin table environment
-    latex_code.append(f"\\begin{{table}}[{position}]")
-    latex_code.append("\\centering")
+    buf.write(f"\\begin{{table}}[{position}]\n")
+    buf.write("\\centering\n")
     
     # Add caption at the top if requested
     if caption and caption_position.lower() == "top":
-        latex_code.append(f"\\caption{{{caption}}}")
+        buf.write(f"\\caption{{{caption}}}\n")
         if label:
-            latex_code.append(f"\\label{{{label}}}")
+            buf.write(f"\\label{{{label}}}\n")
     
     # Begin tabular environment
     # Get the correct number of columns
     n_cols = len(df.columns)
     
+    # Pull each column out of the DataFrame once, for both multirow run
+    # detection and formatting
+    column_series = [df.iloc[:, col_idx] for col_idx in range(n_cols)]
+    
     # Use custom column format if provided, otherwise default to centered columns
     if column_format is None:
-        # Add one extra column for row index
-        col_format = "c" * (n_cols + 1)
+        col_format = _default_column_format(n_cols)
     else:
         col_format = column_format
         
-    latex_code.append(f"\\begin{{tabular}}{{{col_format}}}")
-    
-    # Add toprule
-    latex_code.append("\\toprule")
-    
-    # Add index name as the first column header if it exists
-    index_name = df.index.name if df.index.name else ""
-    
-    # Generate multicolumn headers for each level
-    for level in range(n_levels):
-        header_row = [index_name] if level == 0 else [""]
-        
-        # Get unique values and their spans at this level
-        level_values = df.columns.get_level_values(level)
-        spans = []
-        
-        current_value = level_values[0]
-        current_span = 1
-        
-        for i in range(1, len(level_values)):
-            if level_values[i] == current_value:
-                current_span += 1
-            else:
-                spans.append((current_value, current_span))
-                current_value = level_values[i]
-                current_span = 1
-                
-        # Add the last span
-        spans.append((current_value, current_span))
-        
-        # Create multicolumn entries
-        for value, span in spans:
-            header_row.append(f"\\multicolumn{{{span}}}{{c}}{{{value}}}")
-        
-        latex_code.append(" & ".join(header_row) + " \\\\")
-        
-        # Add a cmidrule after the last header level
-        if level == n_levels - 1:
-            latex_code.append("\\midrule")
-    
     # Find column indices for multirow columns
     multirow_column_indices = {}
     if multirow_columns:
@@ -487,163 +440,87 @@ def pandas_to_latex_with_multicolumn_and_multirow(
     # For each specified column, find runs of identical values
     multirow_runs = {}
     for col_idx, col_name in multirow_column_indices.items():
-        multirow_runs[col_idx] = []
-        values = df.iloc[:, col_idx].values
+        # A run also has to break wherever a multirow starts in a column to the left
+        forced_starts = [
+            start
+            for left_col_idx, left_runs in multirow_runs.items()
+            if left_col_idx < col_idx
+            for start, _ in left_runs
+        ]
         
-        # Find runs of the same value
-        i = 0
-        while i < len(values):
-            start = i
-            value = values[i]
-            
-            # Check if we need to start a new multirow because a column to the left changed
-            force_new_row = False
-            if col_idx > 0:  # Not the leftmost column
-                # Check all columns to the left that are in multirow_column_indices
-                for left_col_idx in multirow_column_indices:
-                    if left_col_idx < col_idx:  # It's to the left
-                        # If this is the start of a multirow in the left column, force a new row here too
-                        for left_start, left_run_length in multirow_runs.get(left_col_idx, []):
-                            if i == left_start:
-                                force_new_row = True
-                                break
-                    if force_new_row:
-                        break
-            
-            # Count how many consecutive rows have the same value
-            j = i + 1
-            run_length = 1
-            
-            while j < len(values) and values[j] == value and not force_new_row:
-                # Check if any column to the left is starting a new multirow at this position
-                if col_idx > 0:
-                    for left_col_idx in multirow_column_indices:
-                        if left_col_idx < col_idx:
-                            for left_start, left_run_length in multirow_runs.get(left_col_idx, []):
-                                if j == left_start:
-                                    # Stop extending this run
-                                    j -= 1
-                                    break
-                            else:
-                                continue
-                            break
-                    else:
-                        # No left column is starting a new multirow, so continue
-                        run_length += 1
-                        j += 1
-                        continue
-                    # A left column is starting a new multirow, so stop here
-                    break
-                else:
-                    # Leftmost column, just count consecutive identical values
-                    run_length += 1
-                    j += 1
-            
-            multirow_runs[col_idx].append((start, run_length))
-            i = j
+        starts, lengths = _find_runs(column_series[col_idx].to_numpy(), forced_starts)
+        multirow_runs[col_idx] = list(zip(starts.tolist(), lengths.tolist()))
     
-    # Add the data rows
-    for row_idx in range(len(df)):
-        row_values = []
-        
-        # First column is the index
-        row_values.append(str(df.index[row_idx]))
-        
-        # Process each column
-        for col_idx in range(len(df.columns)):
-            value = df.iloc[row_idx, col_idx]
-            
-            # Format the value
-            if isinstance(value, float):
-                formatted_value = f"{value:.{float_precision}f}"
-            else:
-                formatted_value = str(value)
-            
-            # Check if this is a multirow column
-            if col_idx in multirow_runs:
-                # Check if this is the start of a multirow
-                is_multirow_start = False
-                multirow_length = 1
-                
-                for start, length in multirow_runs[col_idx]:
-                    if row_idx == start:
-                        is_multirow_start = True
-                        multirow_length = length
-                        break
-                
-                if is_multirow_start and multirow_length > 1:
-                    # Create a multirow cell
-                    row_values.append(f"\\multirow{{{multirow_length}}}{{*}}{{{formatted_value}}}")
-                elif is_multirow_start:
-                    # Single row, just use the formatted value
-                    row_values.append(formatted_value)
-                else:
-                    # Check if this is part of a multirow that already started
-                    is_in_multirow = False
-                    for start, length in multirow_runs[col_idx]:
-                        if start < row_idx < start + length:
-                            is_in_multirow = True
-                            break
-                    
-                    if is_in_multirow:
-                        # Part of a multirow that already started, leave empty
-                        row_values.append("")
-                    else:
-                        # Not part of a multirow, use the formatted value
-                        row_values.append(formatted_value)
-            else:
-                # Regular column, use the formatted value
-                row_values.append(formatted_value)
-        
-        # Add the row to the table
-        latex_code.append(" & ".join(row_values) + " \\\\")
+    # Precompute the role of every row in each multirow column
+    row_roles = {col_idx: _row_roles(runs) for col_idx, runs in multirow_runs.items()}
     
-    # Add bottomrule after last data row
-    latex_code.append("\\bottomrule")
+    # Format each column once up front instead of cell by cell
+    column_strings = [_format_column(values, float_precision) for values in column_series]
     
-    # End the tabular environment
-    latex_code.append("\\end{tabular}")
+    # Convert the index labels to strings once as well
+    index_strings = df.index.map(str).to_numpy()
+    
+    # Add index name as the first column header if it exists
+    index_name = df.index.name if df.index.name else ""
+    
+    # Write the headers and data rows of the tabular environment
+    # (one row of column labels per level, taken from the MultiIndex at once)
+    header_levels = df.columns.to_frame(index=False, allow_duplicates=True).to_numpy(dtype=object).T
+    _write_tabular(buf, col_format, header_levels, column_strings, index_strings, row_roles, index_name=index_name)
     
     # Add caption at the bottom if requested (default)
     if caption and caption_position.lower() != "top":
-        latex_code.append(f"\\caption{{{caption}}}")
+        buf.write(f"\\caption{{{caption}}}\n")
         if label:
-            latex_code.append(f"\\label{{{label}}}")
+            buf.write(f"\\label{{{label}}}\n")
     
-    # End the table environment
-    latex_code.append("\\end{table}")
+    # End the table environment and add a note about required packages
+    buf.write(_TABLE_FOOTER)
     
-    # Add a note about required packages
-    latex_code.append("% Note: This table requires \\usepackage{booktabs} and \\usepackage{multirow} in your LaTeX preamble")
-    
-    return "\n".join(latex_code)
+    return buf.getvalue() if out is None else None
 
 
-def to_latex(data, caption=None, label=None, index=False, float_precision=2, multirow_columns=None):
+def to_latex(data, caption=None, label=None, index=False, float_precision=2, multirow_columns=None, verbose=False, path=None):
     """
     Convert a DataFrame to a LaTeX table with custom formatting.
     Args:
         data (List[dict]): List of dictionaries containing the data to be converted.
         caption (str): The caption for the LaTeX table.
         label (str): The label for the LaTeX table.
-        index (bool): Whether to include the index in the LaTeX table.
+        index (bool): Unused, kept for compatibility; the index is always included.
         float_precision (int): The number of decimal places for floating-point numbers.
         multirow_columns (list): List of column names or indices where cells with 
-        identical consecutive values should be merged using multirow."""
+        identical consecutive values should be merged using multirow.
+        verbose (bool): Whether to print the intermediate DataFrame, the multirow
+        columns and the resulting LaTeX table.
+        path (str): If given, the table is written straight to this file instead
+        of being returned, and None is returned."""
     df = json_to_df(data)
-    print(df)
-    print(multirow_columns)
-    if isinstance(df.columns, pd.MultiIndex):
-        latex_table_custom = pandas_to_latex_with_multicolumn_and_multirow(df, caption=caption, label=label, float_precision=float_precision, multirow_columns=multirow_columns)
-    else:
-        latex_table_custom = df.to_latex(
-                index=index,
-                header=True,
-                float_format=f"%.{float_precision}f",
-                caption=caption,
-                label=label,
-                multicolumn=True,
-                multirow=True
-            )
-    print(latex_table_custom)
+    if verbose:
+        print(df)
+        print(multirow_columns)
+    
+    def render(out):
+        # Always use the custom builder, so the table style and the index
+        # column do not depend on whether multirow cells were requested
+        multi_df = df
+        if not isinstance(df.columns, pd.MultiIndex):
+            # Flat records have plain columns, give them a single header level
+            multi_df = df.set_axis(pd.MultiIndex.from_arrays([df.columns]), axis=1)
+        return pandas_to_latex_with_multicolumn_and_multirow(multi_df, caption=caption, label=label, float_precision=float_precision, multirow_columns=multirow_columns, out=out)
+    
+    if path is not None and not verbose:
+        # Stream the table straight to the file instead of building the full string
+        with open(path, "w") as f:
+            render(f)
+        return None
+    
+    latex_table_custom = render(None)
+    if verbose:
+        print(latex_table_custom)
+    if path is not None:
+        # The table was built as a string to print it, write that to the file
+        with open(path, "w") as f:
+            f.write(latex_table_custom)
+        return None
     return latex_table_custom
\ No newline at end of file
@@ -1,66 +1,186 @@
 import json
+import re
+import numpy as np
 import pandas as pd
 
-def json_to_df(data, row_id_field=None):
-    '''Convert a JSON file to a DataFrame, with support for nested dictionaries and multi-level headers.'''
-    # First pass: discover all possible column hierarchies
-    all_columns = set()
-    all_flat_items = []
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Markers for entering and leaving a nested dictionary in a schema signature
+_OPEN = object()
+_CLOSE = object()
+
+# orjson turns integers outside the 64-bit range into floats, which takes at
+# least 19 digits in a row; such input is left to json
+_LONG_DIGITS = re.compile(r"\d{19}")
+
+def parse_json(text):
+    '''Parse a JSON string, using orjson when it is installed and falling back to json for input it rejects, such as NaN literals, or may corrupt, such as integers beyond 64 bits.'''
+    if orjson is not None and not _LONG_DIGITS.search(text):
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+def extract_columns_and_values(nested_dict, path_order):
+    '''Flatten a nested dictionary into leaf column paths and values, recording the first-seen rank of each path in path_order.'''
+    columns = []
+    flat_dict = {}
+    
+    # Walk the nested dictionaries depth-first with an explicit stack of
+    # (remaining items, path prefix) pairs instead of recursing
+    stack = [(iter(nested_dict.items()), ())]
+    while stack:
+        items, prefix = stack[-1]
+        for key, value in items:
+            path = prefix + (key,)
+            
+            # Store the original order of this path as a running counter
+            if path not in path_order:
+                path_order[path] = len(path_order)
+            
+            if isinstance(value, dict):
+                # Descend into the nested dictionary, resuming this one afterwards
+                stack.append((iter(value.items()), path))
+                break
+            
+            # If the value is a leaf node, store the path and value
+            columns.append(path)
+            flat_dict[path] = value
+        else:
+            stack.pop()
+    
+    return columns, flat_dict
+
+def schema_and_leaves(nested_dict):
+    '''Return a hashable signature of a nested dictionary's key structure and its leaf values, in the order extract_columns_and_values finds them.'''
+    tokens = []
+    leaves = []
+    
+    # Same depth-first walk as extract_columns_and_values, minus the paths
+    stack = [iter(nested_dict.items())]
+    while stack:
+        for key, value in stack[-1]:
+            tokens.append(key)
+            if isinstance(value, dict):
+                tokens.append(_OPEN)
+                stack.append(iter(value.items()))
+                break
+            leaves.append(value)
+        else:
+            stack.pop()
+            tokens.append(_CLOSE)
+    
+    return tuple(tokens), leaves
+
+def json_to_arrays(data, row_id_field=None):
+    '''Flatten JSON records into a 2-D object array of cell values, the row labels (None for positional rows) and the padded column tuples. Raises ValueError if the records hold no values.'''
+    # Single pass over the records: give every leaf path a column position
+    # the first time it is seen, and keep each record as its leaf values plus
+    # the positions they belong to
+    path_columns = {}
+    record_leaves = []
     row_ids = []
     path_order = {}
     
+    # Records usually share one key structure: walk each new structure once
+    # and reuse its column positions for every later record with the same keys
+    schema_positions = {}
+    
     for item in data:
         # Extract potential row ID if specified
         if row_id_field and row_id_field in item:
             row_ids.append(item[row_id_field])
         
         # Extract column structure and flattened values
-        columns, flat_item, updated_path_order = extract_columns_and_values(item, path_order=path_order)
-        path_order.update(updated_path_order)
-        all_columns.update(columns)
-        all_flat_items.append(flat_item)
+        schema, leaves = schema_and_leaves(item)
+        positions = schema_positions.get(schema)
+        if positions is None:
+            columns, _ = extract_columns_and_values(item, path_order)
+            positions = [path_columns.setdefault(path, len(path_columns)) for path in columns]
+            schema_positions[schema] = positions
+        record_leaves.append((positions, leaves))
+    
+    # A table needs at least one value, for the table builders as well as the
+    # DataFrame
+    if not path_columns:
+        raise ValueError("data contains no values to build a table from")
     
     # Determine the maximum depth of the hierarchy
-    max_depth = max(len(col) for col in all_columns) if all_columns else 0
-    
-    # Normalize all column tuples to have the same length
-    normalized_columns = []
-    for col in all_columns:
-        if len(col) < max_depth:
-            # Pad with empty strings
-            normalized_columns.append(col + ('',) * (max_depth - len(col)))
-        else:
-            normalized_columns.append(col)
+    max_depth = max(len(col) for col in path_columns)
+    
+    # Sort columns by the order they first appear in the JSON structure,
+    # comparing the rank of every prefix so columns stay grouped under their
+    # parents. Then normalize all column tuples to have the same length by
+    # padding them with empty strings, sharing one padding tuple per missing
+    # depth
+    ordered_paths = sorted(
+        path_columns,
+        key=lambda path: tuple(path_order[path[:depth]] for depth in range(1, len(path) + 1)),
+    )
+    pad_suffix = [('',) * n for n in range(max_depth + 1)]
+    sorted_columns = [col + pad_suffix[max_depth - len(col)] for col in ordered_paths]
     
-    # Sort columns by their original order in the JSON structure
-    def custom_sort_key(col):
-        original_col = col[:len(col) - col.count('')]
-        if original_col in path_order:
-            return path_order[original_col]
-        # For columns we don't have ordering info, sort them last
-        return (float('inf'), float('inf'))
+    # Move every schema's positions from discovery order to sorted order once,
+    # which updates all records that share the schema
+    col_index = {col: i for i, col in enumerate(sorted_columns)}
+    sorted_position = {path_columns[path]: col_index[col] for path, col in zip(ordered_paths, sorted_columns)}
+    for positions in schema_positions.values():
+        positions[:] = [sorted_position[position] for position in positions]
     
-    sorted_columns = sorted(normalized_columns, key=custom_sort_key)
+    # Fill one preallocated object block rather than assigning every cell
+    # through df.loc. There is at most one row per extracted ID plus one
+    # per item.
+    max_rows = len(record_leaves) + (len(row_ids) if row_id_field else 0)
+    values = np.full((max_rows, len(sorted_columns)), np.nan, dtype=object)
+    index = []
+    row_positions = {}
     
-    # Create the MultiIndex
-    multi_index = pd.MultiIndex.from_tuples(sorted_columns)
+    def add_row(row_idx):
+        row_positions.setdefault(row_idx, []).append(len(index))
+        index.append(row_idx)
     
-    # Create DataFrame with the multi-index columns
+    # Rows for the extracted IDs exist up front, even if they stay empty
     if row_id_field and row_ids:
-        df = pd.DataFrame(index=row_ids, columns=multi_index)
-    else:
-        df = pd.DataFrame(columns=multi_index)
+        for row_id in row_ids:
+            add_row(row_id)
     
-    # Fill in the data
-    for i, flat_item in enumerate(all_flat_items):
-        row_idx = row_ids[i] if row_id_field and i < len(row_ids) else i
+    # Fill in the data. The first items take the extracted IDs as labels in
+    # order, and any items past the last ID keep their position.
+    if row_id_field:
+        row_labels = row_ids + list(range(len(row_ids), len(record_leaves)))
+    else:
+        row_labels = range(len(record_leaves))
+    for row_idx, (positions, leaves) in zip(row_labels, record_leaves):
+        if not leaves:
+            continue
+        if row_idx not in row_positions:
+            add_row(row_idx)
         
-        for col, value in flat_item.items():
-            # Normalize the column tuple if needed
-            if len(col) < max_depth:
-                norm_col = col + ('',) * (max_depth - len(col))
-            else:
-                norm_col = col
-            
-            df.loc[row_idx, norm_col] = value
+        for row_position in row_positions[row_idx]:
+            row = values[row_position]
+            for position, value in zip(positions, leaves):
+                row[position] = value
+    
+    # Rows labelled by their position need no explicit index. Labels have to
+    # be actual ints, since IDs like False/True or 0.0/1.0 compare equal too.
+    n_rows = len(index)
+    if all(type(row_idx) is int for row_idx in index) and index == list(range(n_rows)):
+        index = None
+    return values[:n_rows], index, sorted_columns
+
+def json_to_df(data, row_id_field=None):
+    '''Convert a JSON file to a DataFrame, with support for nested dictionaries and multi-level headers.'''
+    values, index, columns = json_to_arrays(data, row_id_field)
+    
+    # Create DataFrame with the multi-index columns; flat records only need
+    # a plain column index
+    if len(columns[0]) == 1:
+        column_index = pd.Index([col[0] for col in columns])
+    else:
+        column_index = pd.MultiIndex.from_tuples(columns)
+    df = pd.DataFrame(values, index=index, columns=column_index, dtype=object)
     return df
\ No newline at end of file
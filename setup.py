@@ -10,9 +10,10 @@ setup(
     author_email='atwell.ka@northeastern.edu',
 
     packages=find_packages(),
+    python_requires='>=3.9',
     install_requires=[
-        'numpy',
-        'pandas',
+        'numpy>=1.24',
+        'pandas>=2.1',
         'matplotlib',
         'seaborn',
         'scikit-learn',
@@ -20,7 +21,10 @@ setup(
         'statsmodels',
         'nltk',
         'requests',
-        'tqdm',
-        'pytest'
+        'tqdm'
     ],
+    extras_require={
+        'fast': ['orjson>=3.9'],
+        'test': ['pytest'],
+    },
 )
\ No newline at end of file
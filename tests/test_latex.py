@@ -0,0 +1,147 @@
+import io
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from paper_utils.latex import json_to_latex_table_with_multirow, pandas_to_latex_with_multicolumn_and_multirow, to_latex
+
+
+def _data_rows(latex):
+    """Return the data rows between \\midrule and \\bottomrule, split into cells."""
+    body = latex.split("\\midrule\n", 1)[1].split("\\bottomrule", 1)[0]
+    return [line[: -len(" \\\\")].split(" & ") for line in body.splitlines()]
+
+
+def test_pandas_multirow_breaks_inside_equal_run_without_hanging():
+    # The left column starts a new run while the right column stays equal,
+    # which used to loop forever
+    df = pd.DataFrame({("g", "a"): [1, 1, 2, 2], ("g", "b"): ["x", "x", "x", "x"]})
+    result = {}
+    worker = threading.Thread(
+        target=lambda: result.update(latex=pandas_to_latex_with_multicolumn_and_multirow(df, multirow_columns=["a", "b"])),
+        daemon=True,
+    )
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+    
+    assert _data_rows(result["latex"]) == [
+        ["0", "\\multirow{2}{*}{1}", "\\multirow{2}{*}{x}"],
+        ["1", "", ""],
+        ["2", "\\multirow{2}{*}{2}", "\\multirow{2}{*}{x}"],
+        ["3", "", ""],
+    ]
+
+
+def test_json_multirow_breaks_nested_column_under_new_parent():
+    data = [
+        {"model": "A", "cfg": {"lr": 1, "seed": 0}},
+        {"model": "A", "cfg": {"lr": 1, "seed": 1}},
+        {"model": "B", "cfg": {"lr": 1, "seed": 0}},
+    ]
+    latex = json_to_latex_table_with_multirow(data, multirow_columns=["model", "lr"])
+    
+    assert _data_rows(latex) == [
+        ["0", "\\multirow{2}{*}{A}", "\\multirow{2}{*}{1}", "0"],
+        ["1", "", "", "1"],
+        ["2", "B", "1", "0"],
+    ]
+
+
+def test_pandas_builder_keeps_numpy_scalar_formatting():
+    # float32 cells are not Python floats, so they print with str() as before
+    df = pd.DataFrame({("g", "a"): np.array([1.0, 2.5], dtype=np.float32), ("g", "b"): [0.5, 1.0]})
+    
+    assert _data_rows(pandas_to_latex_with_multicolumn_and_multirow(df)) == [
+        ["0", "1.0", "0.5000"],
+        ["1", "2.5", "1.0000"],
+    ]
+
+
+@pytest.mark.parametrize("multirow_columns", [None, ["m"]])
+def test_to_latex_renders_nested_and_flat_records_with_the_custom_builder(multirow_columns):
+    nested = [{"m": "A", "cfg": {"lr": 0.1, "seed": None}}, {"m": "B", "cfg": {"lr": 0.2, "seed": 3}}]
+    flat = [{"m": "A", "s": 0.1}, {"m": "B", "s": None}]
+    
+    nested_latex = to_latex(nested, multirow_columns=multirow_columns)
+    flat_latex = to_latex(flat, multirow_columns=multirow_columns)
+    
+    assert nested_latex.startswith("\\begin{table}[h]\n\\centering\n\\begin{tabular}{cccc}\n")
+    assert _data_rows(nested_latex) == [["0", "A", "0.10", "None"], ["1", "B", "0.20", "3"]]
+    assert flat_latex.startswith("\\begin{table}[h]\n\\centering\n\\begin{tabular}{ccc}\n")
+    assert _data_rows(flat_latex) == [["0", "A", "0.10"], ["1", "B", "None"]]
+
+
+def test_to_latex_renders_large_tables():
+    data = [{"i": i, "g": {"a": i * 0.5, "b": "x", "c": i % 3, "d": None}} for i in range(60000)]
+    
+    rows = _data_rows(to_latex(data))
+    
+    assert len(rows) == 60000
+    assert rows[-1] == ["59999", "59999", "29999.50", "x", "2", "None"]
+
+
+def test_to_latex_sees_in_place_edits():
+    data = [{"m": "a", "s": 0.1}, {"m": "b", "s": 0.2}, {"m": "c", "s": 0.3}]
+    to_latex(data)
+    data[1]["s"] = 0.99
+    latex = to_latex(data)
+    
+    assert "0.99" in latex
+    assert "0.20" not in latex
+
+
+def test_to_latex_distinguishes_inputs_with_the_same_json():
+    assert "\\multicolumn{1}{c}{True}" in to_latex([{"k": {True: 1.5}}])
+    assert "\\multicolumn{1}{c}{true}" in to_latex([{"k": {"true": 1.5}}])
+
+
+@pytest.mark.parametrize("data", [[], [{}]])
+def test_json_builder_rejects_records_without_values(data):
+    with pytest.raises(ValueError):
+        json_to_latex_table_with_multirow(data)
+    with pytest.raises(ValueError):
+        to_latex(data)
+
+
+def test_to_latex_writes_to_path(tmp_path, capsys):
+    data = [{"m": "a", "s": 0.1}, {"m": "b", "s": 0.2}]
+    expected = to_latex(data)
+    
+    path = tmp_path / "table.tex"
+    assert to_latex(data, path=path) is None
+    assert path.read_text() == expected
+    assert capsys.readouterr().out == ""
+    
+    # verbose still prints the table when it goes to a file
+    assert to_latex(data, verbose=True, path=path) is None
+    assert path.read_text() == expected
+    assert capsys.readouterr().out.endswith(expected + "\n")
+
+
+def test_pandas_builder_writes_to_out():
+    df = pd.DataFrame({("g", "a"): [1, 1], ("g", "b"): [0.5, 1.0]})
+    expected = pandas_to_latex_with_multicolumn_and_multirow(df, caption="c", multirow_columns=["a"])
+    
+    out = io.StringIO()
+    assert pandas_to_latex_with_multicolumn_and_multirow(df, caption="c", multirow_columns=["a"], out=out) is None
+    assert out.getvalue() == expected
+
+
+def test_json_builder_writes_to_out():
+    data = [{"m": "A", "cfg": {"lr": 1}}, {"m": "A", "cfg": {"lr": 2}}]
+    expected = json_to_latex_table_with_multirow(data, caption="c", label="t", multirow_columns=["m"])
+    
+    out = io.StringIO()
+    assert json_to_latex_table_with_multirow(data, caption="c", label="t", multirow_columns=["m"], out=out) is None
+    assert out.getvalue() == expected
+
+
+def test_to_latex_does_not_need_jinja2(monkeypatch):
+    # jinja2 is not a dependency; a None entry makes importing it fail
+    monkeypatch.setitem(sys.modules, "jinja2", None)
+    
+    assert "\\multicolumn{1}{c}{m}" in to_latex([{"m": "a", "s": 0.1}])
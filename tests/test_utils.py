@@ -0,0 +1,66 @@
+import math
+
+import pytest
+
+from paper_utils.utils import json_to_df, parse_json
+
+
+def test_json_to_df_flattens_nested_records():
+    data = [
+        {"model": "A", "ds": {"acc": 1, "f1": 0.5}},
+        {"model": "B", "ds": {"acc": 2, "f1": 0.25}},
+    ]
+    df = json_to_df(data)
+    
+    assert list(df.columns) == [("model", ""), ("ds", "acc"), ("ds", "f1")]
+    assert df.to_numpy().tolist() == [["A", 1, 0.5], ["B", 2, 0.25]]
+    assert list(df.index) == [0, 1]
+
+
+def test_json_to_df_sees_in_place_edits():
+    data = [{"m": "a", "s": 0.1}, {"m": "b", "s": 0.2}, {"m": "c", "s": 0.3}]
+    json_to_df(data)
+    data[1]["s"] = 0.99
+    
+    assert json_to_df(data)["s"].tolist() == [0.1, 0.99, 0.3]
+
+
+def test_json_to_df_keeps_columns_grouped_under_their_parent():
+    df = json_to_df([{"a": 1, "b": 2}, {"a": {"x": 3}, "b": 4}])
+    assert list(df.columns) == [("a", ""), ("a", "x"), ("b", "")]
+    
+    df = json_to_df([
+        {"ds1": {"acc": 1}, "ds2": {"acc": 2}},
+        {"ds1": {"acc": 3, "f1": 0.5}, "ds2": {"acc": 4}},
+    ])
+    assert list(df.columns) == [("ds1", "acc"), ("ds1", "f1"), ("ds2", "acc")]
+
+
+def test_json_to_df_keeps_row_ids_that_equal_positions():
+    df = json_to_df([{"id": False, "v": 1}, {"id": True, "v": 2}], row_id_field="id")
+    assert [type(label) for label in df.index] == [bool, bool]
+    
+    df = json_to_df([{"id": 0.0, "v": 1}, {"id": 1.0, "v": 2}], row_id_field="id")
+    assert [type(label) for label in df.index] == [float, float]
+
+
+@pytest.mark.parametrize("data", [[], [{}]])
+def test_json_to_df_rejects_records_without_values(data):
+    with pytest.raises(ValueError):
+        json_to_df(data)
+
+
+
+def test_parse_json_falls_back_for_nan_literals():
+    parsed = parse_json('[{"a": NaN, "b": 1}]')
+    
+    assert math.isnan(parsed[0]["a"])
+    assert parsed[0]["b"] == 1
+
+
+@pytest.mark.parametrize("number", [123456789012345678901234567890, -9223372036854775809, 18446744073709551616])
+def test_parse_json_keeps_integers_beyond_64_bits(number):
+    parsed = parse_json('[{"a": %d, "b": 0.5}]' % number)
+    
+    assert parsed == [{"a": number, "b": 0.5}]
+    assert type(parsed[0]["a"]) is int